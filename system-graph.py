@@ -21,30 +21,248 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import argparse
-import json
+import concurrent.futures
+import fcntl
+import functools
+import mmap
 import multiprocessing
 import os
+import pickle
+import struct
 import sys
 import time
 import _string
 from collections import deque, namedtuple
 from string import Formatter
+from types import SimpleNamespace
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional. Without it, the graphs are computed from plain
+    # Python objects, which is slower but works everywhere.
+    np = None
+
+# Numba is optional as well. Without it, the kernels below fall back
+# to plain NumPy vector operations. Importing it and JIT-compiling the
+# kernels costs a sizeable fraction of a second, which only a
+# long-running daemon can amortise, so one-shot invocations skip it.
+numba = None
+if '--daemon' in sys.argv[1:]:
+    try:
+        import numba
+    except ImportError:
+        pass
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional. Without it, JSON history files are handled
+    # by the stdlib json module, which is slower but works everywhere.
+    orjson = None
 
 
 NetSpeedTuple = namedtuple('NetSpeedTuple', ['rx', 'tx'])
 
+# The fields of /proc/meminfo that are of interest to MemStat and SwapStat.
+_MEMINFO_KEYS = frozenset((b'MemTotal', b'MemAvailable', b'MemFree',
+                           b'SwapTotal', b'SwapFree'))
+
+# The /proc files that a Stats() sample is built from.
+PROC_PATHS = {
+    'meminfo': '/proc/meminfo',
+    'stat': '/proc/stat',
+    'loadavg': '/proc/loadavg',
+    'net': '/proc/net/dev',
+}
+
+# The number of CPU cores. Determined once, as the lookup may involve a
+# syscall or parsing /proc/cpuinfo on some platforms and the value is
+# needed for every rendered load average.
+_CPU_COUNT = multiprocessing.cpu_count()
+
 # Global variable to hold the network interfaces in a consistent order.
 interfaces = []
 # Global variable to hold the calculated maximum speed values for the network
-# interfaces.
+# interfaces, as NetSpeedTuples of plain floats (in bytes per second).
 max_speed = {}
 
+# The UTF-8 glyphs that represent percentages, from empty to full block.
+LEVELS = ' ' + ''.join(chr(0x2580 + i) for i in range(1, 9))
+if np is not None:
+    # The same glyphs as an array, for vectorized lookups.
+    LEVELS_ARR = np.array(list(LEVELS))
+
+
+class ProcSweeper(object):
+
+    """Read all /proc files needed for a sample in one sweep.
+
+    The file descriptors are opened once and kept for the lifetime of
+    the process. Taking a new sample then costs a single pread() per
+    file instead of an open/read/close triple, which matters because
+    this tool is syscall-bound rather than compute-bound.
+    """
+
+    # Size of the reads issued per file. Large enough that almost all
+    # files come back in a single read.
+    READ_SIZE = 16384
+
+    _instance = None
+
+    def __init__(self):
+        self.fds = {name: os.open(path, os.O_RDONLY)
+                    for name, path in PROC_PATHS.items()}
+
+    @classmethod
+    def get(cls):
+        """Return the shared ProcSweeper instance, creating it if needed."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _pread_all(self, fd):
+        """Read a whole file from a persistent descriptor.
+
+        Almost all files fit into the first read, but /proc/net/dev
+        and /proc/stat can exceed READ_SIZE on hosts with very many
+        interfaces or cores, so keep reading until a short read marks
+        the end of the file.
+
+        :fd: the file descriptor to read
+        :returns: the file contents as bytes
+        """
+        buf = os.pread(fd, self.READ_SIZE, 0)
+        if len(buf) < self.READ_SIZE:
+            return buf
+        chunks = [buf]
+        offset = len(buf)
+        while len(buf) == self.READ_SIZE:
+            buf = os.pread(fd, self.READ_SIZE, offset)
+            chunks.append(buf)
+            offset += len(buf)
+        return b''.join(chunks)
+
+    def sweep(self):
+        """Re-read all files from the start.
+
+        :returns: a dict mapping the names from PROC_PATHS to the raw
+            file contents as bytes
+        """
+        return {name: self._pread_all(fd)
+                for name, fd in self.fds.items()}
+
+
+def _read_proc(path):
+    """Read the whole contents of a /proc file.
+
+    A single fixed-size read can truncate large files such as
+    /proc/net/dev on hosts with very many interfaces, so read until
+    the end of the file is reached.
+
+    :path: the file to read
+    :returns: the file contents as bytes
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, ProcSweeper.READ_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return b''.join(chunks)
+
+
+def _parse_meminfo(buf):
+    """Extract the fields of interest from raw /proc/meminfo data.
+
+    A single pass over the data is cheaper than iterating the file
+    separately for every stat class.
+
+    :buf: the contents of /proc/meminfo as bytes
+    :returns: a dict mapping field names to their values (in kB)
+    """
+    meminfo = {}
+    for line in buf.split(b'\n'):
+        key, sep, rest = line.partition(b':')
+        if sep and key in _MEMINFO_KEYS:
+            meminfo[key.decode()] = int(rest.split(None, 1)[0])
+    return meminfo
+
+
+def _read_meminfo():
+    """Read and parse /proc/meminfo once.
+
+    :returns: a dict mapping field names to their values (in kB)
+    """
+    return _parse_meminfo(_read_proc('/proc/meminfo'))
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_field(field_name):
+    """Parse a replacement field name into keyword and accessors.
+
+    The format strings are fixed for the lifetime of the program, so
+    the parsed form is cached and each field name is only split once.
+
+    :field_name: the field being looked up
+    :returns: the keyword and a tuple of (is_attr, index) accessors,
+        with indices in slice notation already compiled to slice objects
+    """
+    first, rest = _string.formatter_field_name_split(field_name)
+    accessors = []
+    for is_attr, i in rest:
+        if not is_attr and isinstance(i, str) and ':' in i:
+            # i is an index in slice notation. Compile it once here, so
+            # that applying it is a plain subscript.
+            i = slice(*[int(j) if j else None for j in i.split(':')])
+        accessors.append((is_attr, i))
+    return first, tuple(accessors)
+
 
 class GraphFormatter(Formatter):
 
     """Formatter for the formatstring command line parameter."""
 
+    def compile(self, format_string):
+        """Pre-parse `format_string` into a list of render steps.
+
+        The format string is fixed for the lifetime of the program, so
+        walking it once up front removes the parsing work from every
+        subsequent render.
+
+        :format_string: the format string to compile
+        :returns: a list of (literal, field_name, conversion,
+            format_spec) render steps for format_compiled()
+        """
+        return [(literal, field_name, conversion, format_spec)
+                for literal, field_name, format_spec, conversion
+                in self.parse(format_string)]
+
+    def format_compiled(self, steps, **kwargs):
+        """Render pre-compiled format steps.
+
+        Equivalent to format() for the format strings supported by this
+        tool (keyword fields only, no auto-numbering or nested format
+        specifications), but without re-parsing the format string.
+
+        :steps: render steps as returned by compile()
+        :kwargs: the objects available to replacement fields
+        :returns: the rendered string
+        """
+        result = []
+        for literal, field_name, conversion, format_spec in steps:
+            if literal:
+                result.append(literal)
+            if field_name is not None:
+                obj, _ = self.get_field(field_name, (), kwargs)
+                obj = self.convert_field(obj, conversion)
+                result.append(self.format_field(obj, format_spec))
+        return ''.join(result)
+
     def get_field(self, field_name, args, kwargs):
         """Find the object `field_name` references.
 
@@ -54,9 +272,9 @@ class GraphFormatter(Formatter):
         :returns: the referenced object and the used field
         """
 
-        # Parse the file_name. first is the keyword, rest contains the
+        # Parse the field_name. first is the keyword, rest contains the
         # attributes and indices, if any.
-        first, rest = _string.formatter_field_name_split(field_name)
+        first, rest = _parse_field(field_name)
 
         # Get the python object referenced by first.
         obj = self.get_value(first, args, kwargs)
@@ -65,16 +283,17 @@ class GraphFormatter(Formatter):
         for is_attr, i in rest:
             if is_attr:
                 # i is the name of an attribute.
-                if isinstance(obj, list):
+                if np is not None and isinstance(obj, (np.ndarray, np.void)):
+                    # Attribute access on a structured array maps to a
+                    # field access (e.g. {loadavg.5}) without touching
+                    # the per-element paths below.
+                    obj = obj[i]
+                elif isinstance(obj, list):
                     obj = [getattr(o, i) for o in obj]
                 else:
                     obj = getattr(obj, i)
-            elif ':' in str(i):
-                # i is an index in slice notation.
-                obj = obj[slice(*[int(j) if j else None
-                                  for j in i.split(':')])]
             else:
-                # i is a simple index.
+                # i is a simple index or a precompiled slice.
                 obj = obj[i]
 
         return obj, first
@@ -82,43 +301,135 @@ class GraphFormatter(Formatter):
     def convert_field(self, value, conversion):
         """Do conversion on the resulting object.
 
+        Unless something else is requested, supported values are
+        converted to UTF-8 glyphs using the graph_char function. The
+        concrete type of the value picks its handler with a single dict
+        lookup; the full isinstance chain only runs for types missing
+        from the table, e.g. subclasses.
+
         :value: the value to be converted
         :conversion: the conversion type
         :returns: the converted value
         """
+        handler = _CONVERTERS.get(type(value))
+        if handler is not None:
+            return handler(self, value, conversion)
+        return self._convert_any(value, conversion)
 
-        # Unless something else is requested, convert supported values to UTF-8
-        # glyphs using the graph_char function. Fall back to default conversion
-        # otherwise.
-        if isinstance(value, BaseStat):
-            if not conversion:
-                return graph_char(value.percentage())
-            else:
-                return (super(GraphFormatter, self).
-                        convert_field(value.percentage(), conversion))
-        elif isinstance(value, float) and not conversion:
+    def _convert_null(self, value, conversion):
+        """Convert a padding NullStat value.
+
+        :value: the value to be converted
+        :conversion: the conversion type
+        :returns: the converted value
+        """
+        # Padding values always render as the empty glyph. Skip the
+        # percentage computation and glyph lookup entirely.
+        if not conversion:
+            return NullStat.GLYPH
+        return (super(GraphFormatter, self).
+                convert_field(value.percentage(), conversion))
+
+    def _convert_stat(self, value, conversion):
+        """Convert a stat object via its percentage.
+
+        :value: the value to be converted
+        :conversion: the conversion type
+        :returns: the converted value
+        """
+        if not conversion:
+            return graph_char(value.percentage())
+        return (super(GraphFormatter, self).
+                convert_field(value.percentage(), conversion))
+
+    def _convert_float(self, value, conversion):
+        """Convert a bare percentage value.
+
+        :value: the value to be converted
+        :conversion: the conversion type
+        :returns: the converted value
+        """
+        if not conversion:
             return graph_char(value)
+        return super(GraphFormatter, self).convert_field(value, conversion)
+
+    def _convert_array(self, value, conversion):
+        """Convert a NumPy array or structured scalar.
+
+        :value: the value to be converted
+        :conversion: the conversion type
+        :returns: the converted value
+        """
+        if value.dtype.names:
+            # Structured values (loadavg) default to their first field,
+            # the normalised 1-minute load average.
+            value = value[value.dtype.names[0]]
+        if getattr(value, 'ndim', 0):
+            # A whole (sub-)history of percentages: one glyph each,
+            # computed in a single vectorized lookup.
+            if not conversion:
+                return graph_chars(value)
+            return ''.join([self.convert_field(float(v), conversion)
+                            for v in value])
+        return self.convert_field(float(value), conversion)
+
+    def _convert_list(self, value, conversion):
+        """Convert a list of values element-wise.
+
+        :value: the value to be converted
+        :conversion: the conversion type
+        :returns: the converted value
+        """
+        try:
+            return ''.join([self.convert_field(v, conversion)
+                            for v in value])
+        except TypeError:
+            # This can happen, if value is a list of NetSpeed objects. This
+            # can not be solved in a sensible manner. Raise a marginally
+            # more informative exception.
+            raise ValueError('Invalid formatstring.')
+
+    def _convert_netspeed(self, value, conversion):
+        """Convert a NetSpeed object to the requested unit.
+
+        :value: the value to be converted
+        :conversion: the conversion type
+        :returns: the converted value
+        """
+        if conversion == 'k' or conversion is None:
+            # network speed in kB/s
+            return value.kbs()
+        elif conversion == 'm':
+            # network speed in MB/s
+            return value.mbs()
+        elif conversion == 'g':
+            # network speed in GB/s
+            return value.gbs()
+        else:
+            raise ValueError("Unknown format code '{}'".format(conversion))
+
+    def _convert_any(self, value, conversion):
+        """Convert a value whose type is not in the dispatch table.
+
+        Handles subclasses of the supported types and falls back to the
+        default conversion for everything else.
+
+        :value: the value to be converted
+        :conversion: the conversion type
+        :returns: the converted value
+        """
+        if isinstance(value, NullStat):
+            return self._convert_null(value, conversion)
+        elif isinstance(value, BaseStat):
+            return self._convert_stat(value, conversion)
+        elif isinstance(value, float):
+            return self._convert_float(value, conversion)
+        elif np is not None and isinstance(value, (np.ndarray, np.void)):
+            return self._convert_array(value, conversion)
         elif isinstance(value, list):
-            try:
-                return ''.join([self.convert_field(v, conversion)
-                                for v in value])
-            except TypeError:
-                # This can happen, if value is a list of NetSpeed objects. This
-                # can not be solved in a sensible manner. Raise a marginally
-                # more informative exception.
-                raise ValueError('Invalid formatstring.')
+            return self._convert_list(value, conversion)
         elif isinstance(value, NetSpeed):
-            if conversion == 'k' or conversion is None:
-                # network speed in kB/s
-                return value.kbs()
-            elif conversion == 'm':
-                # network speed in MB/s
-                return value.mbs()
-            elif conversion == 'g':
-                # network speed in GB/s
-                return value.gbs()
-            else:
-                raise ValueError("Unknown format code '{}'".format(conversion))
+            return self._convert_netspeed(value, conversion)
         else:
             return super(GraphFormatter, self).convert_field(value, conversion)
 
@@ -127,6 +438,8 @@ class NetSpeed(object):
 
     """Handle and format network speed data."""
 
+    __slots__ = ('_speed',)
+
     def __init__(self, speed):
         """Initialise the object.
 
@@ -184,6 +497,11 @@ class Stats(object):
 
     """Class that stores all data handled by this tool."""
 
+    # Slotted instances are smaller and have faster attribute access
+    # than ones with a __dict__; up to max_points+1 of them are alive
+    # per render. All sub-stat classes are slotted as well.
+    __slots__ = ('timestamp', 'mem', 'swap', 'loadavg', 'cpu', 'net')
+
     def __init__(self, timestamp=None, mem=None, swap=None, loadavg=None,
                  cpu=None, net=None):
         """Initialises the object with given values or current stats.
@@ -197,17 +515,37 @@ class Stats(object):
         """
 
         self.timestamp = timestamp if timestamp else time.time()
-        self.mem = mem if mem else MemStat()
-        self.swap = swap if swap else SwapStat()
-        self.loadavg = loadavg if loadavg else LoadAvgStat()
-        self.cpu = cpu if cpu else CPUStat()
-        self.net = net if net else NetStat()
+        # All /proc files are read up front in a single sweep over
+        # persistent file descriptors. The sub-stats are then built from
+        # the in-memory buffers.
+        meminfo = None
+        bufs = {}
+        if not (mem and swap and loadavg and cpu and net):
+            bufs = ProcSweeper.get().sweep()
+        if not (mem and swap):
+            meminfo = _parse_meminfo(bufs['meminfo'])
+        self.mem = mem if mem else MemStat(meminfo=meminfo)
+        self.swap = swap if swap else SwapStat(meminfo=meminfo)
+        self.loadavg = loadavg if loadavg else LoadAvgStat(buf=bufs['loadavg'])
+        self.cpu = cpu if cpu else CPUStat(buf=bufs['stat'])
+        self.net = net if net else NetStat(buf=bufs['net'],
+                                           timestamp=self.timestamp)
+
+    def __reduce__(self):
+        """Pickle as the stored values only, not a class dict.
+
+        :returns: a (callable, arguments) tuple for pickle
+        """
+        return (Stats, (self.timestamp, self.mem, self.swap, self.loadavg,
+                        self.cpu, self.net))
 
 
 class BaseStat(object):
 
     """Basic interface for stats."""
 
+    __slots__ = ()
+
     def percentage(self):
         """Return a value between 0 and 1 representing the percentage
         of used resources. More than 1 may be returned to indicate
@@ -220,6 +558,12 @@ class NullStat(BaseStat):
 
     """Stat that always returns 0 for percentage() and all attributes."""
 
+    __slots__ = ('_attr',)
+
+    # The glyph a padding value renders as, precomputed so that the
+    # formatter can emit it without any float math.
+    GLYPH = LEVELS[0]
+
     def __init__(self, attr=0.0):
         """Initialise the object.
 
@@ -245,38 +589,37 @@ class MemStat(BaseStat):
 
     """Memory usage stats."""
 
-    def __init__(self, total=None, free=None):
+    __slots__ = ('total', 'free')
+
+    def __init__(self, total=None, free=None, meminfo=None):
         """Initialises the object with given values or current stats.
 
         :total: total system memory (in kB)
         :free: free system memory (in kB)
+        :meminfo: dict of /proc/meminfo values as returned by
+            _read_meminfo()
         """
 
-        self.total = None
-        self.free = None
-        if total:
-            self.total = total
-        if free:
-            self.free = free
+        self.total = total
+        self.free = free
         if not total or not free:
             # Get any missing values from /proc/meminfo.
-            with open('/proc/meminfo', 'r') as f:
-                # Overwriting free is OK here. If it was set before,
-                # self.free is already set and free does not matter
-                # anymore.
-                free = None
-                available = None
-                for line in f:
-                    if line.startswith('MemTotal') and not self.total:
-                        self.total = int(line.split()[1])
-                    elif line.startswith('MemAvailable') and not self.free:
-                        available = int(line.split()[1])
-                    elif line.startswith('MemFree') and not self.free:
-                        free = int(line.split()[1])
+            if meminfo is None:
+                meminfo = _read_meminfo()
+            if not self.total:
+                self.total = meminfo.get('MemTotal')
             if not self.free:
                 # Set the amount of free memory. Prefer MemAvailable but fall
                 # back to MemFree for older kernels (pre 3.14).
-                self.free = available if available else free
+                self.free = (meminfo.get('MemAvailable') or
+                             meminfo.get('MemFree'))
+
+    def __reduce__(self):
+        """Pickle as the stored values only, not a class dict.
+
+        :returns: a (callable, arguments) tuple for pickle
+        """
+        return (MemStat, (self.total, self.free))
 
     def percentage(self):
         """Return the amount of used memory as a percentage.
@@ -294,25 +637,36 @@ class SwapStat(BaseStat):
 
     """Swap usage stats."""
 
-    def __init__(self, total=None, free=None):
+    __slots__ = ('total', 'free')
+
+    def __init__(self, total=None, free=None, meminfo=None):
         """Initialises the object with given values or current stats.
 
         :total: total swap space (in kB)
         :free: free swap space (in kB)
+        :meminfo: dict of /proc/meminfo values as returned by
+            _read_meminfo()
         """
 
         if not total or not free:
             # Get any missing values from /proc/meminfo.
-            with open('/proc/meminfo', 'r') as f:
-                for line in f:
-                    if line.startswith('SwapTotal') and not total:
-                        total = int(line.split()[1])
-                    elif line.startswith('SwapFree') and not free:
-                        free = int(line.split()[1])
+            if meminfo is None:
+                meminfo = _read_meminfo()
+            if not total:
+                total = meminfo.get('SwapTotal')
+            if not free:
+                free = meminfo.get('SwapFree')
         # Set the attributes.
         self.total = total
         self.free = free
 
+    def __reduce__(self):
+        """Pickle as the stored values only, not a class dict.
+
+        :returns: a (callable, arguments) tuple for pickle
+        """
+        return (SwapStat, (self.total, self.free))
+
     def percentage(self):
         """Return the amount of used swap space as a percentage.
 
@@ -329,20 +683,34 @@ class LoadAvgStat(BaseStat):
 
     """Load average stats."""
 
-    def __init__(self, load1=None, load5=None, load15=None):
+    __slots__ = ('load1', 'load5', 'load15')
+
+    def __init__(self, load1=None, load5=None, load15=None, buf=None):
         """Initialises the object with given values or current stats.
 
         :load1: load average over the last minute
         :load5: load average over the last five minutes
         :load15: load average over the last fifteen minutes
+        :buf: the contents of /proc/loadavg as bytes
         """
 
         if load1 is None or load5 is None or load15 is None:
-            load1, load5, load15 = os.getloadavg()
+            if buf is not None:
+                load1, load5, load15 = [float(i)
+                                        for i in buf.split(None, 3)[:3]]
+            else:
+                load1, load5, load15 = os.getloadavg()
         self.load1 = load1
         self.load5 = load5
         self.load15 = load15
 
+    def __reduce__(self):
+        """Pickle as the stored values only, not a class dict.
+
+        :returns: a (callable, arguments) tuple for pickle
+        """
+        return (LoadAvgStat, (self.load1, self.load5, self.load15))
+
     def __getattr__(self, name):
         """Provide access to normalised load values.
         :name: 1 5 or 15
@@ -350,11 +718,11 @@ class LoadAvgStat(BaseStat):
             CPU cores
         """
         if name == '1':
-            return self.load1 / multiprocessing.cpu_count()
+            return self.load1 / _CPU_COUNT
         elif name == '5':
-            return self.load5 / multiprocessing.cpu_count()
+            return self.load5 / _CPU_COUNT
         elif name == '15':
-            return self.load15 / multiprocessing.cpu_count()
+            return self.load15 / _CPU_COUNT
         else:
             raise AttributeError(name)
 
@@ -369,11 +737,14 @@ class CPUStat(BaseStat):
 
     """CPU usage stats."""
 
-    def __init__(self, total=None, idle=None):
+    __slots__ = ('total', 'idle')
+
+    def __init__(self, total=None, idle=None, buf=None):
         """Initialises the object with given values or current stats.
 
         :total: total time spent (in ticks)
         :idle: time spent idle (in ticks)
+        :buf: the contents of /proc/stat as bytes
         """
 
         if total is not None and idle is not None:
@@ -382,12 +753,21 @@ class CPUStat(BaseStat):
             self.idle = idle
         else:
             # Obtain the current CPU stats from /proc/stat.
-            with open('/proc/stat', 'r') as f:
-                for line in f:
-                    if line.startswith('cpu '):
-                        self.total = sum(int(i) for i in line.split()[1:])
-                        self.idle = int(line.split()[4])
-                        break
+            if buf is None:
+                buf = _read_proc('/proc/stat')
+            for line in buf.split(b'\n'):
+                if line.startswith(b'cpu '):
+                    fields = line.split()
+                    self.total = sum(int(i) for i in fields[1:])
+                    self.idle = int(fields[4])
+                    break
+
+    def __reduce__(self):
+        """Pickle as the stored values only, not a class dict.
+
+        :returns: a (callable, arguments) tuple for pickle
+        """
+        return (CPUStat, (self.total, self.idle))
 
     def percentage(self):
         """Return the CPU usage as a percentage.
@@ -415,28 +795,61 @@ class NetStat(BaseStat):
 
     """Network stats."""
 
-    def __init__(self, **kwargs):
-        """Initialises the object with given values or current stats."""
+    # All interfaces live in a single dict, so that instances stay
+    # slotted and iterating over the interfaces is a plain scan. The
+    # underscore slots hold lazily computed values.
+    __slots__ = ('_ifaces', '_rx_bps', '_tx_bps', '_rx', '_tx')
+
+    def __init__(self, buf=None, timestamp=None, **kwargs):
+        """Initialises the object with given values or current stats.
+
+        :buf: the contents of /proc/net/dev as bytes
+        :timestamp: time the sample was taken; defaults to the current
+            time
+        """
         global interfaces
+        self._ifaces = {}
+        self._rx_bps = None
+        self._tx_bps = None
+        self._rx = None
+        self._tx = None
         if kwargs:
-            self.__dict__ = kwargs
+            self._ifaces = dict(kwargs)
         else:
             # Detect and initialise interfaces.
-            with open('/proc/net/dev', 'r') as f:
-                # Skip the first two lines, they contain only headers.
-                f.readline()
-                f.readline()
-                # Loop over the remaining lines and obtain the interface names
-                # and stats.
-                for line in f:
-                    ifname = line.split(':')[0].strip()
-                    rx_bytes = int(line.split()[1])
-                    tx_bytes = int(line.split()[9])
-                    if ifname != 'lo':
-                        setattr(self, ifname,
-                                IfStat(name=ifname, rx_bytes=rx_bytes,
-                                       tx_bytes=tx_bytes, time=time.time()))
-                        interfaces.append(ifname)
+            if buf is None:
+                buf = _read_proc('/proc/net/dev')
+            # Skip the first two lines, they contain only headers. Loop
+            # over the remaining lines and obtain the interface names
+            # and stats. Each line is tokenized only once and all
+            # interfaces share the timestamp of the sample.
+            now = timestamp if timestamp else time.time()
+            for line in buf.split(b'\n')[2:]:
+                name, sep, rest = line.partition(b':')
+                if not sep:
+                    continue
+                name = name.strip()
+                if name == b'lo':
+                    continue
+                # Only the first 9 columns are of interest: received
+                # bytes and transmitted bytes.
+                cols = rest.split(None, 10)
+                ifstat = IfStat(name=name.decode(), rx_bytes=int(cols[0]),
+                                tx_bytes=int(cols[8]), time=now)
+                self._ifaces[ifstat.name] = ifstat
+                # Remember the name for positional access, but only
+                # once: a daemon samples in a loop and must not grow
+                # the list (or alias {net.N} to the wrong interface)
+                # with every sample.
+                if ifstat.name not in interfaces:
+                    interfaces.append(ifstat.name)
+
+    def __reduce__(self):
+        """Pickle as the stored values only, not a class dict.
+
+        :returns: a (callable, arguments) tuple for pickle
+        """
+        return (_make_netstat, (self._ifaces,))
 
     def __sub__(self, other):
         """Subtract another NetStat object.
@@ -446,68 +859,124 @@ class NetStat(BaseStat):
         """
         if isinstance(other, NetStat):
             attrs = {}
-            for interface in self.__dict__:
-                attrs[interface] = (getattr(self, interface) -
-                                    getattr(other, interface))
+            for name, ifstat in self._ifaces.items():
+                attrs[name] = ifstat - other._ifaces[name]
             return NetStat(**attrs)
         else:
             raise NotImplementedError()
 
-    def __getattr__(self, name):
-        """Implement rx_speed, tx_speed, rx and tx attributes."""
-        if name == 'rx_speed':
-            # rx_speed is the measured network speed of all interfaces in bytes
-            # per second
-            return sum([getattr(self, interface).rx_speed
-                        for interface in self.__dict__])
-        elif name == 'tx_speed':
-            # tx_speed is the measured network speed of all interfaces in bytes
-            # per second
-            return sum([getattr(self, interface).tx_speed
-                        for interface in self.__dict__])
-        elif name == 'rx':
-            # rx is rx_speed normalised to be between 0 and 1 where 1
-            # represents the maximum network speed measured on all interfaces
+    @property
+    def rx_bps(self):
+        """The measured network speed of all interfaces as a plain
+        float in bytes per second."""
+        if self._rx_bps is None:
+            self._rx_bps = sum([ifstat.rx_bps
+                                for ifstat in self._ifaces.values()])
+        return self._rx_bps
+
+    @property
+    def tx_bps(self):
+        """The measured network speed of all interfaces as a plain
+        float in bytes per second."""
+        if self._tx_bps is None:
+            self._tx_bps = sum([ifstat.tx_bps
+                                for ifstat in self._ifaces.values()])
+        return self._tx_bps
+
+    @property
+    def rx_speed(self):
+        """The measured network speed of all interfaces as a NetSpeed
+        object."""
+        return NetSpeed(self.rx_bps)
+
+    @property
+    def tx_speed(self):
+        """The measured network speed of all interfaces as a NetSpeed
+        object."""
+        return NetSpeed(self.tx_bps)
+
+    @property
+    def rx(self):
+        """rx_speed normalised to be between 0 and 1 where 1 represents
+        the maximum network speed measured on all interfaces."""
+        if self._rx is None:
             try:
-                return (self.rx_speed.bs() /
-                        sum([max_speed[interface].rx
-                             for interface in self.__dict__]).bs())
+                self._rx = (self.rx_bps /
+                            sum([max_speed[name].rx
+                                 for name in self._ifaces]))
             except ZeroDivisionError:
-                return 0.0
-        elif name == 'tx':
-            # tx is tx_speed normalised to be between 0 and 1 where 1
-            # represents the maximum network speed measured on all interfaces
+                self._rx = 0.0
+        return self._rx
+
+    @property
+    def tx(self):
+        """tx_speed normalised to be between 0 and 1 where 1 represents
+        the maximum network speed measured on all interfaces."""
+        if self._tx is None:
             try:
-                return (self.tx_speed.bs() /
-                        sum([max_speed[interface].tx
-                             for interface in self.__dict__]).bs())
+                self._tx = (self.tx_bps /
+                            sum([max_speed[name].tx
+                                 for name in self._ifaces]))
             except ZeroDivisionError:
-                return 0.0
-        elif name.isdigit():
-            # Return the <name>th IfStat object.
-            try:
-                return getattr(self, interfaces[int(name)])
-            except IndexError:
-                raise AttributeError(name)
-        else:
+                self._tx = 0.0
+        return self._tx
+
+    def nth(self, i):
+        """Return the i-th IfStat object.
+
+        :i: position of the interface in the order of /proc/net/dev
+        :returns: an IfStat object
+        """
+        try:
+            return self._ifaces[interfaces[i]]
+        except IndexError:
+            raise AttributeError(str(i))
+
+    def __getattr__(self, name):
+        """Provide access to interfaces by name or position (e.g.
+        {net.eth0} or {net.0})."""
+        if name.startswith('_'):
             raise AttributeError(name)
+        try:
+            return self._ifaces[name]
+        except KeyError:
+            pass
+        if name.isdigit():
+            return self.nth(int(name))
+        raise AttributeError(name)
 
     def percentage(self):
         """Return the network usage as a percentage.
         :returns: a value between 0 and 1 representing the network usage
         """
         try:
-            return ((self.rx_speed + self.tx_speed).bs() /
-                    sum([max_speed[interface].rx + max_speed[interface].tx
-                         for interface in self.__dict__]).bs())
+            return ((self.rx_bps + self.tx_bps) /
+                    sum([max_speed[name].rx + max_speed[name].tx
+                         for name in self._ifaces]))
         except ZeroDivisionError:
             return 0.0
 
 
+def _make_netstat(ifaces):
+    """Rebuild a NetStat from its interface dict when unpickling.
+
+    :ifaces: a dict mapping interface names to IfStat objects
+    :returns: a NetStat object
+    """
+    return NetStat(**ifaces)
+
+
 class IfStat(BaseStat):
 
     """Network stats for a specific interface."""
 
+    # The underscore slots hold lazily computed values. Slotted
+    # instances are considerably smaller than ones with a __dict__ and
+    # attribute access is faster, which matters because one IfStat is
+    # allocated per interface per sample pair.
+    __slots__ = ('name', 'rx_bytes', 'tx_bytes', 'time',
+                 '_rx_bps', '_tx_bps')
+
     def __init__(self, name, rx_bytes, tx_bytes, time):
         """Initialises the object with given values.
 
@@ -520,6 +989,15 @@ class IfStat(BaseStat):
         self.rx_bytes = rx_bytes
         self.tx_bytes = tx_bytes
         self.time = time
+        self._rx_bps = None
+        self._tx_bps = None
+
+    def __reduce__(self):
+        """Pickle as the stored values only, not a class dict.
+
+        :returns: a (callable, arguments) tuple for pickle
+        """
+        return (IfStat, (self.name, self.rx_bytes, self.tx_bytes, self.time))
 
     def __sub__(self, other):
         """Subtract another IfStat object.
@@ -535,38 +1013,55 @@ class IfStat(BaseStat):
         else:
             raise NotImplementedError()
 
-    def __getattr__(self, name):
-        """Implement rx_speed, tx_speed, rx and tx attributes."""
-        if name == 'rx_speed':
-            # rx_speed is the measured network speed in bytes per second
-            try:
-                return NetSpeed(self.rx_bytes / self.time)
-            except ZeroDivisionError:
-                return NetSpeed(0)
-        elif name == 'tx_speed':
-            # tx_speed is the measured network speed in bytes per second
-            try:
-                return NetSpeed(self.tx_bytes / self.time)
-            except ZeroDivisionError:
-                return NetSpeed(0)
-        elif name == 'rx':
-            # rx is rx_speed normalised to be between 0 and 1 where 1
-            # represents the maximum network speed available on this interface
+    @property
+    def rx_bps(self):
+        """The measured network speed as a plain float in bytes per
+        second."""
+        if self._rx_bps is None:
             try:
-                return ((self.rx_bytes / self.time) /
-                        max_speed[self.name].rx.bs())
+                self._rx_bps = self.rx_bytes / self.time
             except ZeroDivisionError:
-                return 0.0
-        elif name == 'tx':
-            # tx is tx_speed normalised to be between 0 and 1 where 1
-            # represents the maximum network speed available on this interface
+                self._rx_bps = 0.0
+        return self._rx_bps
+
+    @property
+    def tx_bps(self):
+        """The measured network speed as a plain float in bytes per
+        second."""
+        if self._tx_bps is None:
             try:
-                return ((self.tx_bytes / self.time) /
-                        max_speed[self.name].tx.bs())
+                self._tx_bps = self.tx_bytes / self.time
             except ZeroDivisionError:
-                return 0.0
-        else:
-            raise AttributeError(name)
+                self._tx_bps = 0.0
+        return self._tx_bps
+
+    @property
+    def rx_speed(self):
+        """The measured network speed as a NetSpeed object."""
+        return NetSpeed(self.rx_bps)
+
+    @property
+    def tx_speed(self):
+        """The measured network speed as a NetSpeed object."""
+        return NetSpeed(self.tx_bps)
+
+    @property
+    def rx(self):
+        """rx_speed normalised to be between 0 and 1 where 1 represents
+        the maximum network speed available on this interface."""
+        try:
+            return self.rx_bps / max_speed[self.name].rx
+        except ZeroDivisionError:
+            return 0.0
+
+    @property
+    def tx(self):
+        """tx_speed normalised to be between 0 and 1 where 1 represents
+        the maximum network speed available on this interface."""
+        try:
+            return self.tx_bps / max_speed[self.name].tx
+        except ZeroDivisionError:
+            return 0.0
 
     def percentage(self):
         """Return the network usage as a percentage.
@@ -574,12 +1069,467 @@ class IfStat(BaseStat):
         """
         # This is the speed of received and transmitted data, normalised
         try:
-            return (((self.rx_bytes + self.tx_bytes) / self.time) /
-                    (max_speed[self.name].rx + max_speed[self.name].tx).bs())
+            return ((self.rx_bps + self.tx_bps) /
+                    (max_speed[self.name].rx + max_speed[self.name].tx))
         except ZeroDivisionError:
             return 0.0
 
 
+# Exact-type dispatch table for GraphFormatter.convert_field, built once
+# all value types are known. The hot path is a single dict lookup on the
+# concrete type instead of an isinstance ladder per formatted value.
+_CONVERTERS = {
+    NullStat: GraphFormatter._convert_null,
+    MemStat: GraphFormatter._convert_stat,
+    SwapStat: GraphFormatter._convert_stat,
+    LoadAvgStat: GraphFormatter._convert_stat,
+    CPUStat: GraphFormatter._convert_stat,
+    NetStat: GraphFormatter._convert_stat,
+    IfStat: GraphFormatter._convert_stat,
+    float: GraphFormatter._convert_float,
+    list: GraphFormatter._convert_list,
+    NetSpeed: GraphFormatter._convert_netspeed,
+}
+if np is not None:
+    _CONVERTERS[np.ndarray] = GraphFormatter._convert_array
+    _CONVERTERS[np.void] = GraphFormatter._convert_array
+    _CONVERTERS[np.float64] = GraphFormatter._convert_float
+
+
+if np is not None and numba is not None:
+    @numba.njit(cache=True, nogil=True)
+    def _compute_cpu_pct(total, idle, out):
+        """Compute CPU usage percentages from cumulative tick counters.
+
+        :total: array of total tick counters, most recent first
+        :idle: array of idle tick counters, most recent first
+        :out: output array of length len(total) - 1
+        """
+        for i in range(total.shape[0] - 1):
+            d_total = total[i] - total[i + 1]
+            if d_total != 0:
+                out[i] = (d_total - (idle[i] - idle[i + 1])) / d_total
+            else:
+                out[i] = 0.0
+
+    @numba.njit(cache=True, nogil=True)
+    def _per_if_maxspeed(rx_bytes, tx_bytes, times, out_rx, out_tx):
+        """Compute the maximum speed per interface, one row at a time.
+
+        :rx_bytes: 2-d array of rx counters, one row per interface
+        :tx_bytes: 2-d array of tx counters, one row per interface
+        :times: 2-d array of sample times, one row per interface
+        :out_rx: output array of per-interface maximum rx speeds
+        :out_tx: output array of per-interface maximum tx speeds
+        """
+        for i in range(rx_bytes.shape[0]):
+            rx_max = 1024.0
+            tx_max = 1024.0
+            for j in range(rx_bytes.shape[1] - 1):
+                d_time = times[i, j] - times[i, j + 1]
+                if d_time != 0:
+                    rx = (rx_bytes[i, j] - rx_bytes[i, j + 1]) / d_time
+                    tx = (tx_bytes[i, j] - tx_bytes[i, j + 1]) / d_time
+                    if rx > rx_max:
+                        rx_max = rx
+                    if tx > tx_max:
+                        tx_max = tx
+            out_rx[i] = rx_max
+            out_tx[i] = tx_max
+
+    # Warm the kernels once at import. With cache=True the compiled
+    # code is cached on disk, so the JIT cost is only paid on the very
+    # first run.
+    _compute_cpu_pct(np.zeros(2), np.zeros(2), np.zeros(1))
+    _per_if_maxspeed(np.zeros((1, 2)), np.zeros((1, 2)), np.zeros((1, 2)),
+                     np.zeros(1), np.zeros(1))
+elif np is not None:
+    def _compute_cpu_pct(total, idle, out):
+        """Compute CPU usage percentages from cumulative tick counters.
+
+        :total: array of total tick counters, most recent first
+        :idle: array of idle tick counters, most recent first
+        :out: output array of length len(total) - 1
+        """
+        d_total = total[:-1] - total[1:]
+        np.divide(d_total - (idle[:-1] - idle[1:]), d_total, out=out,
+                  where=d_total != 0)
+
+    def _per_if_maxspeed(rx_bytes, tx_bytes, times, out_rx, out_tx):
+        """Compute the maximum speed per interface, one row at a time.
+
+        :rx_bytes: 2-d array of rx counters, one row per interface
+        :tx_bytes: 2-d array of tx counters, one row per interface
+        :times: 2-d array of sample times, one row per interface
+        :out_rx: output array of per-interface maximum rx speeds
+        :out_tx: output array of per-interface maximum tx speeds
+        """
+        d_time = times[:, :-1] - times[:, 1:]
+        rx_speed = np.zeros_like(d_time)
+        tx_speed = np.zeros_like(d_time)
+        np.divide(rx_bytes[:, :-1] - rx_bytes[:, 1:], d_time, out=rx_speed,
+                  where=d_time != 0)
+        np.divide(tx_bytes[:, :-1] - tx_bytes[:, 1:], d_time, out=tx_speed,
+                  where=d_time != 0)
+        np.maximum(rx_speed.max(axis=1), 1024.0, out=out_rx)
+        np.maximum(tx_speed.max(axis=1), 1024.0, out=out_tx)
+
+
+class StatsHistory(object):
+
+    """Struct-of-arrays view of a sequence of Stats objects.
+
+    Rendering a graph from a list of stat objects costs thousands of
+    Python-level attribute lookups and method calls. This class
+    transposes the history into one NumPy array per metric, so that the
+    percentages for whole graphs are computed with a handful of vector
+    operations instead. Requires NumPy.
+    """
+
+    def __init__(self, stats, max_points):
+        """Initialise the arrays from `stats`.
+
+        :stats: sequence of Stats objects, most recent first
+        :max_points: length of the history arrays; missing samples are
+            padded with zeros (which render as empty glyphs)
+        """
+        stats = list(stats)
+        t = len(stats)
+        n = min(t, max_points)
+        # Memory and swap usage percentages.
+        self.mem = np.zeros(max_points)
+        self.swap = np.zeros(max_points)
+        for out, attr in ((self.mem, 'mem'), (self.swap, 'swap')):
+            total = np.array([getattr(s, attr).total for s in stats[:n]],
+                             dtype=np.float64)
+            free = np.array([getattr(s, attr).free for s in stats[:n]],
+                            dtype=np.float64)
+            np.divide(total - free, total, out=out[:n], where=total != 0)
+        # Load averages, normalised by the number of CPU cores. The
+        # fields are named like the corresponding LoadAvgStat
+        # attributes, so that attribute access in format strings maps to
+        # a field access.
+        self.loadavg = np.zeros(max_points,
+                                dtype=[('1', 'f8'), ('5', 'f8'), ('15', 'f8')])
+        for field, attr in (('1', 'load1'), ('5', 'load5'), ('15', 'load15')):
+            self.loadavg[field][:n] = [getattr(s.loadavg, attr)
+                                       for s in stats[:n]]
+            self.loadavg[field] /= _CPU_COUNT
+        # CPU usage percentages. CPU time is counted over the whole
+        # uptime, so the percentages are computed from the differences
+        # between consecutive samples.
+        self.cpu = np.zeros(max_points)
+        cpu_total = np.array([s.cpu.total for s in stats], dtype=np.float64)
+        cpu_idle = np.array([s.cpu.idle for s in stats], dtype=np.float64)
+        if t > 1:
+            _compute_cpu_pct(cpu_total, cpu_idle, self.cpu[:t - 1])
+        # Raw network counters, one row per interface, one column per
+        # sample. These are only used to derive the maximum speeds.
+        self.ifnames = list(stats[0].net._ifaces) if stats else []
+        self.rx_bytes = np.array([[getattr(s.net, name).rx_bytes
+                                   for s in stats]
+                                  for name in self.ifnames], dtype=np.float64)
+        self.tx_bytes = np.array([[getattr(s.net, name).tx_bytes
+                                   for s in stats]
+                                  for name in self.ifnames], dtype=np.float64)
+        self.if_times = np.array([[getattr(s.net, name).time for s in stats]
+                                  for name in self.ifnames], dtype=np.float64)
+
+    # Hosts with fewer interfaces than this are handled in a single
+    # pass; a worker pool would only add overhead.
+    POOL_THRESHOLD = 8
+
+    def max_speeds(self, workers=None):
+        """Determine the maximum speed observed on each interface.
+
+        On hosts with many interfaces (bridges, bonds, VLANs, ...) the
+        interfaces are split across a thread pool. The kernels release
+        the GIL, so the chunks are reduced in parallel.
+
+        :workers: maximum number of worker threads, or None to pick one
+            per CPU core (capped at the number of interfaces)
+        :returns: a dict mapping interface names to NetSpeedTuples of
+            the maximum rx and tx speeds, but no less than 1 kB/s
+        """
+        speeds = {}
+        nif = len(self.ifnames)
+        rx_max = np.full(nif, 1024.0)
+        tx_max = np.full(nif, 1024.0)
+        if nif and self.rx_bytes.shape[1] > 1:
+            if workers is None:
+                workers = min(os.cpu_count() or 1, nif)
+            if nif >= self.POOL_THRESHOLD and workers > 1:
+                # One contiguous chunk of interfaces per worker. The
+                # output arrays are written through disjoint views.
+                step = -(-nif // workers)
+                with concurrent.futures.ThreadPoolExecutor(
+                        max_workers=workers) as executor:
+                    futures = [executor.submit(
+                        _per_if_maxspeed,
+                        self.rx_bytes[lo:lo + step],
+                        self.tx_bytes[lo:lo + step],
+                        self.if_times[lo:lo + step],
+                        rx_max[lo:lo + step], tx_max[lo:lo + step])
+                        for lo in range(0, nif, step)]
+                    for future in futures:
+                        future.result()
+            else:
+                _per_if_maxspeed(self.rx_bytes, self.tx_bytes,
+                                 self.if_times, rx_max, tx_max)
+        for i, name in enumerate(self.ifnames):
+            speeds[name] = NetSpeedTuple(float(rx_max[i]), float(tx_max[i]))
+        return speeds
+
+
+class MaxTracker(object):
+
+    """Sliding-window maximum of per-interface network speeds.
+
+    print_graphs normally re-scans the whole history window to find the
+    maximum speeds. A long-running daemon can instead push each new
+    sample into this tracker, which maintains one monotonic deque per
+    interface and direction: pushing a sample and reading the current
+    maximum are O(1) amortised, independent of the window length.
+    """
+
+    def __init__(self, window):
+        """Initialise the tracker.
+
+        :window: number of recent samples the maximum is taken over
+        """
+        self.window = window
+        # Maps interface names to (rx, tx) pairs of monotonic deques
+        # holding (sample index, speed) tuples in decreasing speed
+        # order.
+        self._deques = {}
+        self._index = 0
+        self._last = None
+
+    def push(self, sample):
+        """Add a new sample to the window.
+
+        :sample: a Stats object
+        """
+        if self._last is not None:
+            diff = sample.net - self._last.net
+            for name, ifstat in diff._ifaces.items():
+                rxd, txd = self._deques.setdefault(name, (deque(), deque()))
+                for dq, value in ((rxd, ifstat.rx_bps),
+                                  (txd, ifstat.tx_bps)):
+                    # Drop samples that can never be the maximum again,
+                    # append the new one, and expire samples that have
+                    # aged out of the window.
+                    while dq and dq[-1][1] <= value:
+                        dq.pop()
+                    dq.append((self._index, value))
+                    while dq[0][0] <= self._index - self.window:
+                        dq.popleft()
+            self._index += 1
+        self._last = sample
+
+    def max_speeds(self):
+        """Return the current per-interface maxima.
+
+        :returns: a dict mapping interface names to NetSpeedTuples of
+            the maximum rx and tx speeds, but no less than 1 kB/s
+        """
+        speeds = {}
+        if self._last is not None:
+            for name in self._last.net._ifaces:
+                rxd, txd = self._deques.get(name, ((), ()))
+                speeds[name] = NetSpeedTuple(
+                    max(rxd[0][1], 1024.0) if rxd else 1024.0,
+                    max(txd[0][1], 1024.0) if txd else 1024.0)
+        return speeds
+
+
+class BinaryHistory(object):
+
+    """Fixed-size circular binary history file.
+
+    The file consists of a small header (including the interface
+    names), followed by a fixed number of equally sized record slots
+    used as a ring buffer. The whole file is memory-mapped: persisting
+    a sample packs one record plus the header directly into the
+    mapping - O(1) and no write() syscalls - instead of re-serialising
+    the whole history, and loading is a single struct unpack pass over
+    the mapping, with no parsing.
+
+    The instance holds an exclusive lock on the file until close() is
+    called.
+    """
+
+    MAGIC = b'SGRB'
+    VERSION = 1
+    # magic, version, capacity, head, count, length of the name blob.
+    HEADER = struct.Struct('<4sHIIII')
+    # timestamp, mem total/free, swap total/free, cpu total/idle,
+    # load1/5/15; one rx/tx counter pair per interface follows.
+    RECORD_BASE = '<dQQQQQQddd'
+
+    def __init__(self, path, capacity, ifnames):
+        """Open or create the history file.
+
+        An existing file is reused if its layout matches; otherwise
+        (other version, capacity or interfaces, or a legacy JSON file)
+        it is re-initialised empty.
+
+        :path: location of the history file
+        :capacity: number of record slots
+        :ifnames: names of the network interfaces to store
+        """
+        self.path = path
+        self.capacity = capacity
+        self.ifnames = list(ifnames)
+        self._names_blob = '\n'.join(self.ifnames).encode()
+        self.record = struct.Struct(self.RECORD_BASE +
+                                    'QQ' * len(self.ifnames))
+        self.data_offset = self.HEADER.size + len(self._names_blob)
+        self.size = self.data_offset + capacity * self.record.size
+        self.head = 0
+        self.count = 0
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        fresh = not self._read_header()
+        if fresh:
+            # Salvage the samples of a legacy JSON history before the
+            # file is re-created as an empty, zeroed ring buffer of
+            # the right size.
+            legacy = self._load_legacy()
+            self.head = 0
+            self.count = 0
+            os.ftruncate(self.fd, 0)
+            os.ftruncate(self.fd, self.size)
+        self._mm = mmap.mmap(self.fd, self.size)
+        if fresh:
+            self._mm[self.HEADER.size:self.data_offset] = self._names_blob
+            self._write_header()
+            for stat in legacy[-self.capacity:]:
+                # Records taken with a different interface set cannot
+                # be stored in this layout.
+                if all(name in stat.net._ifaces for name in self.ifnames):
+                    self.append(stat)
+
+    def _read_header(self):
+        """Validate an existing file against the current layout.
+
+        :returns: True if the file matches and the header was read
+        """
+        buf = os.pread(self.fd, self.HEADER.size, 0)
+        if len(buf) < self.HEADER.size:
+            return False
+        magic, version, capacity, head, count, names_len = \
+            self.HEADER.unpack(buf)
+        if (magic != self.MAGIC or version != self.VERSION or
+                capacity != self.capacity):
+            return False
+        if os.pread(self.fd, names_len, self.HEADER.size) != \
+                self._names_blob:
+            # The set of interfaces changed; start over.
+            return False
+        self.head = head
+        self.count = count
+        return True
+
+    def _write_header(self):
+        """Pack the current header into the mapping."""
+        self.HEADER.pack_into(self._mm, 0, self.MAGIC, self.VERSION,
+                              self.capacity, self.head, self.count,
+                              len(self._names_blob))
+
+    def _load_legacy(self):
+        """Salvage the samples of a legacy JSON history file.
+
+        Earlier releases stored the history as JSON - one array, or
+        one record per line. Such a file is migrated into the ring
+        buffer instead of being clobbered by the first binary-format
+        invocation after an upgrade.
+
+        :returns: a list of Stats objects, oldest first; empty if the
+            file is not a readable JSON history
+        """
+        size = os.fstat(self.fd).st_size
+        if not 0 < size <= (1 << 24):
+            return []
+        buf = os.pread(self.fd, size, 0)
+        if buf[:1] not in (b'[', b'{'):
+            return []
+        if orjson is not None:
+            loads = orjson.loads
+        else:
+            import json
+            loads = json.loads
+        try:
+            if buf[:1] == b'[':
+                # A whole-array file, newest first.
+                return _decode_stats(loads(buf))[::-1]
+            # A line-delimited log, oldest first.
+            return [_decode_stats(loads(line))
+                    for line in buf.split(b'\n') if line]
+        except (ValueError, TypeError, KeyError):
+            # Not a JSON history after all; start over empty.
+            return []
+
+    def append(self, stat):
+        """Persist one sample into the next record slot.
+
+        :stat: a Stats object
+        """
+        values = [stat.timestamp,
+                  stat.mem.total, stat.mem.free,
+                  stat.swap.total, stat.swap.free,
+                  stat.cpu.total, stat.cpu.idle,
+                  stat.loadavg.load1, stat.loadavg.load5,
+                  stat.loadavg.load15]
+        for name in self.ifnames:
+            ifstat = stat.net._ifaces[name]
+            values.append(ifstat.rx_bytes)
+            values.append(ifstat.tx_bytes)
+        self.record.pack_into(self._mm,
+                              self.data_offset + self.head * self.record.size,
+                              *values)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._write_header()
+
+    def load(self):
+        """Read all stored samples.
+
+        :returns: a list of Stats objects, most recent first
+        """
+        # Unpack all record slots in one C-level pass over the mapping.
+        # Struct.iter_unpack avoids a Python-level unpack call per
+        # record and the mmap avoids copying the data through a read().
+        with memoryview(self._mm) as view:
+            records = list(self.record.iter_unpack(view[self.data_offset:]))
+        return [self._to_stats(records[(self.head - 1 - j) % self.capacity])
+                for j in range(self.count)]
+
+    def _to_stats(self, rec):
+        """Construct a Stats object from an unpacked record.
+
+        :rec: tuple of record values
+        :returns: a Stats object
+        """
+        timestamp = rec[0]
+        net = NetStat(**{
+            name: IfStat(name=name, rx_bytes=rec[10 + 2 * i],
+                         tx_bytes=rec[11 + 2 * i], time=timestamp)
+            for i, name in enumerate(self.ifnames)})
+        return Stats(timestamp=timestamp,
+                     mem=MemStat(total=rec[1], free=rec[2]),
+                     swap=SwapStat(total=rec[3], free=rec[4]),
+                     loadavg=LoadAvgStat(load1=rec[7], load5=rec[8],
+                                         load15=rec[9]),
+                     cpu=CPUStat(total=rec[5], idle=rec[6]),
+                     net=net)
+
+    def close(self):
+        """Release the mapping, the lock and the file."""
+        self._mm.close()
+        os.close(self.fd)
+
+
 def to_json(python_object):
     """Serialise custom objects to the JSON format.
 
@@ -587,10 +1537,18 @@ def to_json(python_object):
     :returns: a structure that can be serialised
     """
     # Check if the object needs serialising.
-    if (isinstance(python_object, Stats) or
+    if isinstance(python_object, NetStat):
+        # Serialise only the interfaces, not any cached values.
+        return {'NetStat': dict(python_object._ifaces)}
+    elif (isinstance(python_object, Stats) or
             isinstance(python_object, BaseStat)):
-        # Serialise it as a dict: {<class>: {<data>}}
-        return {type(python_object).__name__: python_object.__dict__}
+        # Serialise it as a dict: {<class>: {<data>}}. All stat
+        # classes are slotted; cache slots (with a leading underscore)
+        # are not serialised.
+        data = {s: getattr(python_object, s)
+                for s in type(python_object).__slots__
+                if not s.startswith('_')}
+        return {type(python_object).__name__: data}
     else:
         # Raise a TypeError if we can not serialise the object.
         raise TypeError(repr(python_object) + ' is not JSON serializable')
@@ -611,52 +1569,101 @@ def from_json(json_object):
     return json_object
 
 
+def _decode_stats(obj):
+    """Reconstruct stat objects in a decoded JSON tree.
+
+    An object_hook would invoke a Python callback for every parsed
+    dict, keeping the parser off its C fast path (and orjson offers no
+    hook at all). Instead, the plain dicts are converted to stat
+    objects in a single bottom-up pass after parsing.
+
+    :obj: a decoded JSON list, dict or scalar
+    :returns: the tree with all stat dicts replaced by stat objects
+    """
+    if isinstance(obj, list):
+        return [_decode_stats(o) for o in obj]
+    if isinstance(obj, dict):
+        return from_json({key: _decode_stats(value)
+                          for key, value in obj.items()})
+    return obj
+
+
+@functools.lru_cache(maxsize=8)
+def _compile_format(formatstring):
+    """Compile `formatstring` once and cache the render steps.
+
+    :formatstring: the format string to compile
+    :returns: render steps as returned by GraphFormatter.compile()
+    """
+    return GraphFormatter().compile(formatstring)
+
+
 def graph_char(percentage):
     """Return the glyph representing `percentage` as close as possible.
 
     :percentage: value to be represented
     :returns: string consisting of the glyph
     """
-    if percentage > 1:
-        percentage = 1
-    # level contains the UTF-8 glyphs that represent percentages.
-    level = [' ']
-    level.extend([chr(0x2580 + i) for i in range(1, 9)])
-    # step is the accuracy of the representation.
-    step = 1 / (len(level) - 1)
-    # Find the correct glyph.
-    for i in range(0, len(level)):
-        if percentage < (i + 0.5) * step:
-            return level[i]
-
-
-def print_graphs(stats, formatstring, max_points):
+    # Quantize to one of the 9 levels: one multiply, one clamp, one
+    # index into the precomputed glyph table.
+    return LEVELS[0 if percentage <= 0 else
+                  8 if percentage >= 1 else
+                  int(percentage * 8 + 0.5)]
+
+
+def graph_chars(percentages):
+    """Return the glyphs representing an array of percentages.
+
+    :percentages: NumPy array of values to be represented
+    :returns: string consisting of one glyph per value
+    """
+    idx = np.clip((percentages * 8 + 0.5).astype(np.int64), 0, 8)
+    return ''.join(np.take(LEVELS_ARR, idx))
+
+
+def print_graphs(stats, formatstring, max_points, workers=None,
+                 max_speeds=None):
     """Print the data from `stats` to the console according to
     `formatstring`.
 
     :stats: data points to consider
     :formatstring: format of the output
+    :workers: maximum number of worker threads for the per-interface
+        reductions, or None to pick automatically
+    :max_speeds: precomputed per-interface maximum speeds, e.g. from a
+        MaxTracker, or None to scan the history window
     """
     global max_speed
-    # The stats are extracted into lists that represent the history of the
-    # respective attribute.
-    # null is used to fill the lists to the length of max_points entries.
-    null = NullStat()
-    # Memory stats.
-    mem = [s.mem for s in stats][:max_points]
-    mem.extend([null] * (max_points - min(len(stats), max_points)))
-    # Swap space stats.
-    swap = [s.swap for s in stats][:max_points]
-    swap.extend([null] * (max_points - min(len(stats), max_points)))
-    # Load average stats.
-    loadavg = [s.loadavg for s in stats][:max_points]
-    loadavg.extend([null] * (max_points - min(len(stats), max_points)))
-    # CPU stats are counted over the whole uptime. To get meaningful stats
-    # about the current CPU usage, we calculate the differences.
-    cpu = []
-    for i in range(0, len(stats) - 1):
-        cpu.append(stats[i].cpu - stats[i + 1].cpu)
-    cpu.extend([null] * (max_points - (len(stats) - 1)))
+    history = None
+    if np is not None:
+        # Fast path: transpose the history into struct-of-arrays NumPy
+        # buffers and compute all percentages with vector operations.
+        history = StatsHistory(stats, max_points)
+        mem = history.mem
+        swap = history.swap
+        loadavg = history.loadavg
+        cpu = history.cpu
+    else:
+        # The stats are extracted into lists that represent the history of
+        # the respective attribute.
+        # null is used to fill the lists to the length of max_points
+        # entries.
+        null = NullStat()
+        # Memory stats.
+        mem = [s.mem for s in stats][:max_points]
+        mem.extend([null] * (max_points - min(len(stats), max_points)))
+        # Swap space stats.
+        swap = [s.swap for s in stats][:max_points]
+        swap.extend([null] * (max_points - min(len(stats), max_points)))
+        # Load average stats.
+        loadavg = [s.loadavg for s in stats][:max_points]
+        loadavg.extend([null] * (max_points - min(len(stats), max_points)))
+        # CPU stats are counted over the whole uptime. To get meaningful
+        # stats about the current CPU usage, we calculate the differences.
+        cpu = []
+        for i in range(0, len(stats) - 1):
+            cpu.append(stats[i].cpu - stats[i + 1].cpu)
+        cpu.extend([null] * (max_points - (len(stats) - 1)))
     # Network stats are counted over the whole uptime as well.
     # The simple NullStat does not provide a sufficient interface to pass as
     # IfStat or NetStat. Thus, we buid up a proper NetStat object with proper
@@ -665,26 +1672,269 @@ def print_graphs(stats, formatstring, max_points):
     net = []
     for i in range(0, len(stats) - 1):
         net.append(stats[i].net - stats[i + 1].net)
-    for interface in stats[0].net.__dict__:
-        null_if = IfStat(name=interface, rx_bytes=0, tx_bytes=0, time=0)
-        null_ifs[interface] = null_if
-        # Determine the maximum rx and tx speed observed on this interface,
-        # but do not go below 1 kB/s
-        rx_max = max([getattr(n, interface).rx_speed for n in net] +
-                     [NetSpeed(1024)])
-        tx_max = max([getattr(n, interface).tx_speed for n in net] +
-                     [NetSpeed(1024)])
-        max_speed[interface] = NetSpeedTuple(rx_max, tx_max)
+    if max_speeds is not None:
+        # The caller maintains the maxima incrementally; no need to
+        # re-scan the window.
+        max_speed.update(max_speeds)
+        for interface in stats[0].net._ifaces:
+            null_ifs[interface] = IfStat(name=interface, rx_bytes=0,
+                                         tx_bytes=0, time=0)
+    elif history is not None:
+        # The maximum speeds come from the struct-of-arrays counters.
+        max_speed.update(history.max_speeds(workers=workers))
+        for interface in history.ifnames:
+            null_ifs[interface] = IfStat(name=interface, rx_bytes=0,
+                                         tx_bytes=0, time=0)
+    else:
+        for interface in stats[0].net._ifaces:
+            null_if = IfStat(name=interface, rx_bytes=0, tx_bytes=0, time=0)
+            null_ifs[interface] = null_if
+            # Determine the maximum rx and tx speed observed on this
+            # interface, but do not go below 1 kB/s
+            rx_max = max([getattr(n, interface).rx_bps for n in net] +
+                         [1024.0])
+            tx_max = max([getattr(n, interface).tx_bps for n in net] +
+                         [1024.0])
+            max_speed[interface] = NetSpeedTuple(rx_max, tx_max)
     null_net = NetStat(**null_ifs)
     del null_ifs
     net.extend([null_net] * (max_points - (len(stats) - 1)))
-    # Print the graph using a GraphFormatter.
+    # Print the graph using a GraphFormatter. The format string is
+    # compiled once and reused across renders.
     f = GraphFormatter()
-    print(f.format(formatstring, mem=mem, swap=swap, loadavg=loadavg, cpu=cpu,
-                   net=net))
+    print(f.format_compiled(_compile_format(formatstring), mem=mem, swap=swap,
+                            loadavg=loadavg, cpu=cpu, net=net))
+
+
+def _replace_file(path, buf):
+    """Atomically replace the contents of `path` with `buf`.
+
+    The data is written to a sibling temporary file in one write()
+    call and moved into place with a single rename, so a crash mid
+    write can never leave a truncated or empty history file behind.
+
+    :path: the file to replace
+    :buf: the new contents as bytes
+    """
+    tmp = '{}.tmp.{}'.format(path, os.getpid())
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, buf)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def tick(args, render=True, tracker=None):
+    """Take one sample, update the history file and optionally render.
+
+    The history file is locked for the read-modify-write cycle, so a
+    daemon and interactive invocations can safely share it.
+
+    :args: parsed command line arguments
+    :render: whether to print the graphs after sampling
+    :tracker: a MaxTracker fed with each sample, whose maxima are then
+        used for rendering instead of re-scanning the history
+    """
+    max_speeds = None
+    if args.history_format == 'binary':
+        # Create a new data point with current measurements and persist
+        # it into its ring buffer slot - O(1) instead of rewriting the
+        # whole history.
+        sample = Stats()
+        if tracker is not None:
+            tracker.push(sample)
+            max_speeds = tracker.max_speeds()
+        history = BinaryHistory(args.file, args.max_points + 1,
+                                list(sample.net._ifaces))
+        history.append(sample)
+        stats = history.load() if render else None
+        history.close()
+    elif args.history_format == 'pickle':
+        # Same read-modify-write cycle as the JSON path below, but with
+        # binary framing and C-level encoding instead of per-object
+        # dict reconstruction and float formatting.
+        fd = os.open(args.file, os.O_RDONLY | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'rb') as f:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                stats = pickle.load(f)[:args.max_points + 1]
+            except EOFError:
+                stats = []
+            sample = Stats()
+            if tracker is not None:
+                tracker.push(sample)
+                max_speeds = tracker.max_speeds()
+            stats.insert(0, sample)
+            del stats[args.max_points + 1:]
+            _replace_file(args.file, pickle.dumps(stats, protocol=5))
+    else:
+        if orjson is None:
+            # The stdlib json module is only needed (and only paid
+            # for at all) as a fallback when orjson is missing.
+            import json
+        max_lines = args.max_points + 1
+        # The JSON history is a line-delimited log: each tick appends
+        # exactly one record - O(1) I/O - and only the tail of the
+        # file is read back, instead of re-parsing and rewriting the
+        # whole list every time.
+        fd = os.open(args.file, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            size = os.fstat(fd).st_size
+            # Read blocks from the end of the file until enough lines
+            # are present for the whole history window.
+            buf = b''
+            pos = size
+            while pos > 0 and buf.count(b'\n') <= max_lines:
+                start = max(0, pos - 8192)
+                buf = os.pread(fd, pos - start, start) + buf
+                pos = start
+            lines = buf.split(b'\n')
+            if pos > 0:
+                # The first line may be cut off mid-record.
+                del lines[0]
+            lines = [line for line in lines if line][-max_lines:]
+            loads = orjson.loads if orjson is not None else json.loads
+            legacy = len(lines) == 1 and lines[0][:1] == b'['
+            if legacy:
+                # A pre-NDJSON file holding one JSON array; convert it
+                # on the fly and compact below.
+                stats = _decode_stats(loads(lines[0]))[:max_lines]
+            else:
+                loaded = [_decode_stats(loads(line)) for line in lines]
+                # The log is oldest first, the in-memory history (a
+                # plain list, as the format strings slice and index it
+                # heavily) newest first.
+                stats = loaded[::-1]
+            # Create and append a new data point with current
+            # measurements.
+            sample = Stats()
+            if tracker is not None:
+                tracker.push(sample)
+                max_speeds = tracker.max_speeds()
+            stats.insert(0, sample)
+            del stats[max_lines:]
+            if orjson is not None:
+                line = orjson.dumps(sample, default=to_json)
+            else:
+                line = json.dumps(sample, default=to_json).encode()
+            os.write(fd, line + b'\n')
+            # Compact the log once it grows well past the window (the
+            # total size is estimated from the average line length of
+            # the tail), so it cannot grow without bound.
+            nlines = buf.count(b'\n')
+            if legacy or (nlines and
+                          size > 2 * max_lines * (len(buf) // nlines)):
+                if orjson is not None:
+                    out = [orjson.dumps(s, default=to_json)
+                           for s in reversed(stats)]
+                else:
+                    out = [json.dumps(s, default=to_json).encode()
+                           for s in reversed(stats)]
+                _replace_file(args.file, b'\n'.join(out) + b'\n')
+        finally:
+            os.close(fd)
+    if render:
+        # Print the graphs as specified in args.formatstring.
+        print_graphs(stats, args.formatstring, args.max_points,
+                     workers=args.workers, max_speeds=max_speeds)
+
+
+def run_daemon(args):
+    """Sample and render on a timer in a single long-running process.
+
+    Compared to one invocation per sample, this amortises interpreter
+    startup, module imports and JIT warmup across all samples. The
+    history file is kept up to date, so interactive invocations can
+    still render from it at any time. The per-interface maximum speeds
+    are tracked incrementally across ticks, so each render is O(1) in
+    the window length instead of re-scanning the whole history.
+
+    :args: parsed command line arguments
+    """
+    tracker = MaxTracker(args.max_points)
+    while True:
+        started = time.time()
+        tick(args, tracker=tracker)
+        time.sleep(max(0.0, args.interval - (time.time() - started)))
+
+
+# Command line defaults, shared between the argparse declarations and
+# the fast path in main() that skips argparse entirely.
+_DEFAULTS = {
+    # The history file path is a sentinel: the real default is only
+    # computed in _resolve_file() when --file was not given.
+    'file': None,
+    'max_points': 25,
+    'history_format': 'binary',
+    'workers': None,
+    'daemon': False,
+    'interval': 2.0,
+    'formatstring': 'Mem:{mem[0]}|Swap:{swap[0]}|'
+                    'Load:{loadavg[0].1}{loadavg[0].5}{loadavg[0].15}|'
+                    'CPU:{cpu[0]}|Net:{net[0]}',
+}
+
+
+def _resolve_file(args):
+    """Fill in the default history file path if --file was not given.
+
+    The default needs a getuid() syscall and string work, so it is
+    only computed when no explicit path overrides it anyway.
+
+    :args: parsed command line arguments, modified in place
+    """
+    if args.file is None:
+        args.file = (f'{os.environ.get("TMPDIR", "/tmp")}'
+                     f'/.{os.getuid()}.system-graph')
+
+
+def _read_config():
+    """Read extra command line arguments from the config file.
+
+    The usual case is that no config file exists, so the candidate
+    paths are opened directly and a missing file is detected by the
+    failed open - one syscall per path instead of a stat plus an open.
+
+    :returns: a list of arguments, empty if there is no config file
+    """
+    paths = []
+    paths.append(os.path.join(os.getenv('XDG_CONFIG_HOME', '~/.config'),
+                              'system-graph', 'system-graphrc'))
+    paths.append('~/.system-graphrc')
+    for config_path in paths:
+        try:
+            f = open(os.path.expanduser(config_path), 'r')
+        except FileNotFoundError:
+            continue
+        with f:
+            # One read and one split, instead of materialising a line
+            # object list first. Each line is stripped, as argparse
+            # would reject arguments with stray whitespace.
+            a = [line.strip() for line in f.read().splitlines()]
+        # Drop trailing blank lines; argparse would reject the empty
+        # arguments they would otherwise turn into.
+        while a and not a[-1]:
+            a.pop()
+        return a
+    return []
 
 
 def main():
+    # Fast path: a bare invocation with no config file takes one
+    # sample and renders it with the defaults. Building the argparse
+    # parser (and importing argparse at all) costs a few milliseconds
+    # of startup, which matters when the tool runs from a shell prompt
+    # or status line.
+    a = _read_config()
+    if not a and len(sys.argv) == 1:
+        args = SimpleNamespace(**_DEFAULTS)
+        _resolve_file(args)
+        tick(args)
+        return
+
+    import argparse
     parser = argparse.ArgumentParser(
         formatter_class=argparse.RawDescriptionHelpFormatter,
         description='Displays minimal graphs for system resources',
@@ -845,61 +2095,48 @@ Format Strings:
             show labeled graphs, separated by |, of memory, swap, CPU and
             network usage, each with a short history of 3 readings""")
 
-    parser.add_argument('--file',
-                        default=os.path.join(
-                            os.getenv('TMPDIR', '/tmp'),
-                            '.{}.system-graph'.format(os.getuid())),
+    parser.add_argument('--file', default=_DEFAULTS['file'],
                         help='Location where temporary data is stored '
-                        '(default: %(default)s)')
-    parser.add_argument('--max-points', default=25, type=int,
+                        '(default: $TMPDIR/.<uid>.system-graph)')
+    parser.add_argument('--max-points', default=_DEFAULTS['max_points'],
+                        type=int,
                         help='Maximum number of data points to use (default: '
                         '%(default)s)')
+    parser.add_argument('--history-format',
+                        default=_DEFAULTS['history_format'],
+                        choices=('binary', 'json', 'pickle'),
+                        help='Storage format of the history file. binary is '
+                        'a fixed-size ring buffer that is updated in place; '
+                        'pickle and json rewrite the whole history on every '
+                        'data point, with json kept for compatibility with '
+                        'existing history files (default: %(default)s)')
+    parser.add_argument('--workers', default=_DEFAULTS['workers'], type=int,
+                        help='Maximum number of worker threads for per-'
+                        'interface computations (default: one per CPU core)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Run as a long-running process that takes and '
+                        'renders a data point every --interval seconds '
+                        'instead of one per invocation')
+    parser.add_argument('--interval', default=_DEFAULTS['interval'],
+                        type=float,
+                        help='Sampling interval for --daemon in seconds '
+                        '(default: %(default)s)')
     parser.add_argument('--format', dest='formatstring',
-                        default='Mem:{mem[0]}|Swap:{swap[0]}|'
-                                'Load:{loadavg[0].1}{loadavg[0].5}'
-                                '{loadavg[0].15}|CPU:{cpu[0]}|Net:{net[0]}',
+                        default=_DEFAULTS['formatstring'],
                         help='Format string for the graph to be printed (see '
                         'below)')
 
-    # Try reading arguments from the config file.
-    paths = []
-    paths.append(os.path.join(os.getenv('XDG_CONFIG_HOME', '~/.config'),
-                              'system-graph', 'system-graphrc'))
-    paths.append('~/.system-graphrc')
-    for config_path in [os.path.expanduser(p) for p in paths]:
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                a = [line.strip() for line in f.readlines()]
-            break
-    else:
-        a = []
     # Combine the arguments from the file and the command line and parse both.
     a.extend(sys.argv[1:])
     args = parser.parse_args(a)
     del a
-    del paths
     del parser
+    _resolve_file(args)
 
-    # Read the previous data points.
-    try:
-        with open(args.file, 'r') as f:
-            stats = deque(json.load(f, object_hook=from_json),
-                          maxlen=args.max_points + 1)
-    except FileNotFoundError:
-        # Initialise to an empty deque.
-        # Deques are similar to lists but more efficient when adding or
-        # removing elements at the beginning and able to keep a maximum length.
-        stats = deque(maxlen=args.max_points)
-
-    # Create a new data point with current measurements.
-    stats.appendleft(Stats())
-
-    # Print the graphs as specified in args.formatstring.
-    print_graphs(stats, args.formatstring, args.max_points)
-
-    # Save all data points.
-    with open(args.file, 'w') as f:
-        json.dump(list(stats), f, default=to_json)
+    if args.daemon:
+        run_daemon(args)
+    else:
+        tick(args)
 
 if __name__ == "__main__":
     main()